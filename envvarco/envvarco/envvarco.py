@@ -1,9 +1,13 @@
 import logging
+import numpy as np
 from flask import Flask, request
 from pathlib import Path
 import cimpy
 from pyvolt import network, nv_powerflow
+from pyvolt.network import BusType
 from src.oma_algorithm import fungal_growth_optimizer, capacitor_objective_function, shunt_reactor_objective_function
+from src.contingency_analysis import screen_contingencies
+from src.warm_start import network_key, node_voltages, start_warm_start, get_warm_start, store_warm_start, finish_warm_start
 from src.grid_exporter import export_grid_to_excel  # <-- Reuse your existing Excel export logic
 
 # Flask setup
@@ -13,22 +17,47 @@ app = Flask(__name__)
 logging.basicConfig(filename='envvarco.log', level=logging.INFO)
 logging.info("🚀 Volt/VAR Control Module Started...")
 
+def load_system(base_apparent_power):
+    this_file_folder = Path(__file__).resolve().parent
+    xml_path = this_file_folder / "network"
+    xml_files = [str(xml_path / fname) for fname in [
+        "Rootnet_FULL_NE_06J16h_DI.xml",
+        "Rootnet_FULL_NE_06J16h_EQ.xml",
+        "Rootnet_FULL_NE_06J16h_SV.xml",
+        "Rootnet_FULL_NE_06J16h_TP.xml"
+    ]]
+    res = cimpy.cim_import(xml_files, "cgmes_v2_4_15")
+    system = network.System()
+    system.load_cim_data(res["topology"], base_apparent_power)
+    return system
+
+def apply_operating_point(system, payload):
+    """
+    Apply the operating point streamed into main: node powers in MW/Mvar ("node_powers")
+    and measured slack voltage magnitudes in p.u. ("slack_voltages"), as main's solve_and_inject does.
+    """
+    for node_uuid, (p, q) in payload.get("node_powers", {}).items():
+        node = system.get_node_by_uuid(node_uuid)
+        if node:
+            node.power = complex(p, q)
+            node.power_pu = node.power / node.base_apparent_power
+    for node_uuid, v_pu in payload.get("slack_voltages", {}).items():
+        node = system.get_node_by_uuid(node_uuid)
+        if node and node.type == BusType.SLACK:
+            # Keep the angle, only the magnitude is measured
+            node.voltage_pu = v_pu * np.exp(1j * np.angle(node.voltage_pu))
+            node.voltage = node.voltage_pu * node.baseVoltage
+
 @app.route("/optimize", methods=["POST"])
 def optimize_powerflow():
     try:
         base_apparent_power = request.json.get("base_apparent_power", 25)
         # Load system data
-        this_file_folder = Path(__file__).resolve().parent
-        xml_path = this_file_folder / "network"
-        xml_files = [str(xml_path / fname) for fname in [
-            "Rootnet_FULL_NE_06J16h_DI.xml",
-            "Rootnet_FULL_NE_06J16h_EQ.xml",
-            "Rootnet_FULL_NE_06J16h_SV.xml",
-            "Rootnet_FULL_NE_06J16h_TP.xml"
-        ]]
-        res = cimpy.cim_import(xml_files, "cgmes_v2_4_15")
-        system = network.System()
-        system.load_cim_data(res["topology"], base_apparent_power)
+        system = load_system(base_apparent_power)
+        # Operating point streamed into main, if any
+        apply_operating_point(system, request.json)
+        warm_start_key = network_key(system)
+        warm_start = None
         # Volt/VAR optimization logic — copy from your alternating optimizer
         capacitor_reactive_power = {"N10": 5.0}
         shunt_reactor_reactive_power = {"N9": 8, "N6": 5, "N3": 2}
@@ -49,13 +78,19 @@ def optimize_powerflow():
                 logging.info("✅ All voltages within limits.")
                 break
 
+            if warm_start is None:
+                warm_start = start_warm_start(warm_start_key, node_voltages(results_pf))
+
             if under_nodes:
                 def cap_obj(sol):
                     return capacitor_objective_function(sol, system, capacitor_reactive_power, base_apparent_power)
-                _, best_sol = fungal_growth_optimizer(
-                    50, 20, [1]*len(capacitor_reactive_power), [0]*len(capacitor_reactive_power), len(capacitor_reactive_power), cap_obj
+                initial_solutions, Tmax = get_warm_start(warm_start, "capacitor", 50, 20)
+                pareto_front, best_sol = fungal_growth_optimizer(
+                    50, Tmax, [1]*len(capacitor_reactive_power), [0]*len(capacitor_reactive_power), len(capacitor_reactive_power), cap_obj,
+                    initial_solutions=initial_solutions
                 )
                 binary_solution = [1 if s >= 0.5 else 0 for s in best_sol[:-2]]
+                store_warm_start(warm_start, "capacitor", pareto_front, binary_solution)
                 for idx, (node_name, q_mvar) in enumerate(capacitor_reactive_power.items()):
                     if binary_solution[idx] == 1:
                         node = system.get_node_by_uuid(node_name)
@@ -65,16 +100,22 @@ def optimize_powerflow():
             if over_nodes:
                 def reactor_obj(sol):
                     return shunt_reactor_objective_function(sol, system, shunt_reactor_reactive_power, base_apparent_power)
-                _, best_sol = fungal_growth_optimizer(
-                    50, 20, [1]*len(shunt_reactor_reactive_power), [0]*len(shunt_reactor_reactive_power), len(shunt_reactor_reactive_power), reactor_obj
+                initial_solutions, Tmax = get_warm_start(warm_start, "reactor", 50, 20)
+                pareto_front, best_sol = fungal_growth_optimizer(
+                    50, Tmax, [1]*len(shunt_reactor_reactive_power), [0]*len(shunt_reactor_reactive_power), len(shunt_reactor_reactive_power), reactor_obj,
+                    initial_solutions=initial_solutions
                 )
                 binary_solution = [1 if s >= 0.5 else 0 for s in best_sol[:-2]]
+                store_warm_start(warm_start, "reactor", pareto_front, binary_solution)
                 for idx, (node_name, q_mvar) in enumerate(shunt_reactor_reactive_power.items()):
                     if binary_solution[idx] == 1:
                         node = system.get_node_by_uuid(node_name)
                         node.reactive_power = -(q_mvar / base_apparent_power)
                         activated_reactors.append((node_name, q_mvar))
 
+        if warm_start is not None:
+            finish_warm_start(warm_start)
+
         # Final PF and export
         results_pf, _ = nv_powerflow.solve(system)
         for solved_node in results_pf.nodes:
@@ -96,6 +137,45 @@ def optimize_powerflow():
         logging.error(f"❌ Optimization failed: {e}")
         return {"status": "error", "message": str(e)}, 500
 
+@app.route("/contingency", methods=["POST"])
+def contingency_analysis():
+    """
+    N-1 screening of a Volt/VAR setting, e.g. the one returned by /optimize.
+    Expects "activated_capacitors" and "activated_reactors" as [node, q_mvar] pairs, and
+    optionally the same "node_powers"/"slack_voltages" operating point as /optimize.
+    """
+    workers = request.json.get("workers")
+    v_min = request.json.get("v_min", 0.95)
+    v_max = request.json.get("v_max", 1.05)
+    if workers is not None and (isinstance(workers, bool) or not isinstance(workers, int) or workers < 1):
+        return {"status": "error", "message": "workers must be a positive integer"}, 400
+    if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in (v_min, v_max)) or not 0 < v_min < v_max:
+        return {"status": "error", "message": "v_min and v_max must be numbers with 0 < v_min < v_max"}, 400
+
+    try:
+        base_apparent_power = request.json.get("base_apparent_power", 25)
+        system = load_system(base_apparent_power)
+        # Screen at the same operating point /optimize was given
+        apply_operating_point(system, request.json)
+
+        # Apply the capacitor/reactor setting under test
+        for node_name, q_mvar in request.json.get("activated_capacitors", []):
+            node = system.get_node_by_uuid(node_name)
+            node.reactive_power = (q_mvar / base_apparent_power)
+        for node_name, q_mvar in request.json.get("activated_reactors", []):
+            node = system.get_node_by_uuid(node_name)
+            node.reactive_power = -(q_mvar / base_apparent_power)
+
+        report = screen_contingencies(system, workers=workers, v_min=v_min, v_max=v_max)
+        violating = sum(1 for entry in report["ranking"] if entry["severity"] > 0)
+        logging.info(f"✅ Contingency analysis done: {violating} outages violate voltage limits.")
+
+        return {"status": "success", **report}, 200
+
+    except Exception as e:
+        logging.error(f"❌ Contingency analysis failed: {e}")
+        return {"status": "error", "message": str(e)}, 500
+
 @app.route("/health", methods=["GET"])
 def health_check():
     return "🟢 Volt/VAR control module is live on port 4002", 200
@@ -0,0 +1,392 @@
+import os
+import logging
+import numpy as np
+from scipy.sparse import coo_matrix, csr_matrix, csc_matrix
+from scipy.sparse.linalg import splu
+from concurrent.futures import ProcessPoolExecutor
+from pyvolt.network import BusType
+from pyvolt.nv_powerflow import solve
+
+# Voltage limits used by the Volt/VAR control (p.u.)
+V_MIN = 0.95
+V_MAX = 1.05
+
+# Outage power flow settings
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-8
+
+# Base case shared by the worker processes (set by _init_worker)
+_base_model = None
+
+
+def build_base_model(system):
+    """
+    Solve the intact network once and precompute everything the outage cases share.
+
+    The outage power flows use the same rectangular current-mismatch formulation as
+    nv_powerflow.solve. The specified injections of the non-slack nodes are taken from
+    the solved base case, so they match whatever the pyvolt solver used (including any
+    capacitor/reactor setting applied to the system beforehand).
+
+    Parameters:
+    - system: Loaded pyvolt network.System.
+
+    Returns:
+    - Dictionary holding the sparse admittance matrix and base Jacobian, base voltages,
+      branch data and the bridge branches.
+    """
+    results_pf, _ = solve(system)
+
+    n = system.get_nodes_num()
+    Y = csr_matrix(np.asarray(system.Ymatrix, dtype=complex))
+
+    names = [""] * n
+    V0 = np.ones(n, dtype=complex)
+    is_slack = np.zeros(n, dtype=bool)
+    for solved_node in results_pf.nodes:
+        i = solved_node.topology_node.index
+        names[i] = solved_node.topology_node.name
+        V0[i] = solved_node.voltage_pu
+        is_slack[i] = solved_node.topology_node.type == BusType.SLACK
+
+    # Specified injections (load convention, as in nv_powerflow.solve: I = conj(S / V) = -Y V)
+    S = -V0 * np.conj(Y @ V0)
+
+    branches = []
+    for branch in system.branches:
+        if not branch.start_node or not branch.end_node:
+            logging.warning(f"⚠️ Branch {branch.uuid} has no start or end node, skipped in N-1 screening.")
+            continue
+        branches.append({
+            "uuid": branch.uuid,
+            "from": branch.start_node.name,
+            "to": branch.end_node.name,
+            "fr": branch.start_node.index,
+            "to_idx": branch.end_node.index,
+            "y_pu": complex(branch.y_pu),
+        })
+
+    return {
+        "n": n,
+        "names": names,
+        "V0": V0,
+        "S": S,
+        "is_slack": is_slack,
+        "Y": Y,
+        "H": build_jacobian(Y, is_slack),
+        "branches": branches,
+        "bridges": find_bridges(n, branches),
+    }
+
+
+def build_jacobian(Y, is_slack):
+    """
+    Constant Jacobian of the current mismatch (rows interleaved re/im, columns [V_re, V_im]),
+    kept sparse: each non-slack row only couples a node to its neighbours.
+    """
+    n = Y.shape[0]
+    Y = coo_matrix(Y)
+    pq = ~is_slack[Y.row]
+    rows_Y, cols_Y = Y.row[pq], Y.col[pq]
+    G, B = Y.data[pq].real, Y.data[pq].imag
+    slack = np.flatnonzero(is_slack)
+    H_rows = np.concatenate((2 * rows_Y, 2 * rows_Y, 2 * rows_Y + 1, 2 * rows_Y + 1, 2 * slack, 2 * slack + 1))
+    H_cols = np.concatenate((cols_Y, cols_Y + n, cols_Y, cols_Y + n, slack, slack + n))
+    H_vals = np.concatenate((-G, B, -B, -G, np.ones(len(slack)), np.ones(len(slack))))
+    return csc_matrix((H_vals, (H_rows, H_cols)), shape=(2 * n, 2 * n))
+
+
+def _adjacency(n, branches, skip=None):
+    adjacency = [[] for _ in range(n)]
+    for idx, branch in enumerate(branches):
+        fr, to = branch["fr"], branch["to_idx"]
+        if fr == to or idx == skip:
+            continue
+        adjacency[fr].append((to, idx))
+        adjacency[to].append((fr, idx))
+    return adjacency
+
+
+def find_bridges(n, branches):
+    """
+    Find the branches whose outage splits the network into islands.
+
+    Iterative Tarjan bridge search over the branch multigraph, so parallel branches
+    are never reported. Runs once for the whole sweep instead of once per outage.
+
+    Returns:
+    - Set of indices into branches.
+    """
+    adjacency = _adjacency(n, branches)
+
+    discovery = [-1] * n
+    low = [0] * n
+    bridges = set()
+    timer = 0
+
+    for root in range(n):
+        if discovery[root] != -1:
+            continue
+        discovery[root] = low[root] = timer
+        timer += 1
+        stack = [(root, -1, iter(adjacency[root]))]
+        while stack:
+            node, parent_edge, neighbours = stack[-1]
+            advanced = False
+            for neighbour, edge in neighbours:
+                if edge == parent_edge:
+                    continue
+                if discovery[neighbour] == -1:
+                    discovery[neighbour] = low[neighbour] = timer
+                    timer += 1
+                    stack.append((neighbour, edge, iter(adjacency[neighbour])))
+                    advanced = True
+                    break
+                low[node] = min(low[node], discovery[neighbour])
+            if advanced:
+                continue
+            stack.pop()
+            if stack:
+                parent = stack[-1][0]
+                low[parent] = min(low[parent], low[node])
+                if low[node] > discovery[parent]:
+                    bridges.add(parent_edge)
+
+    return bridges
+
+
+def _iterate(solve_state, V, S, is_slack):
+    """
+    Fixed-point iteration of nv_powerflow.solve (state = H^-1 z) starting from V.
+
+    Returns:
+    - Voltage magnitudes in p.u., or None if the case does not converge.
+    """
+    n = len(V)
+    is_pq = ~is_slack
+    state = np.concatenate((V.real, V.imag))
+    z = np.zeros(2 * n)
+    z[0::2][is_slack] = V[is_slack].real
+    z[1::2][is_slack] = V[is_slack].imag
+
+    for _ in range(MAX_ITERATIONS):
+        # Expected currents of the non-slack nodes
+        I_spec = np.conj(S[is_pq] / V[is_pq])
+        z[0::2][is_pq] = I_spec.real
+        z[1::2][is_pq] = I_spec.imag
+
+        new_state = solve_state(z)
+        if not np.all(np.isfinite(new_state)):
+            return None
+
+        diff = np.amax(np.absolute(new_state - state))
+        state = new_state
+        V = state[:n] + 1j * state[n:]
+        if diff < TOLERANCE:
+            return np.abs(V)
+
+    return None
+
+
+def solve_outage(model, branch_idx):
+    """
+    Solve the power flow with a single branch removed, for outages that keep the network connected.
+
+    Removing a branch is a rank-2 change of the constant Jacobian, so the sparse LU
+    factors of the base Jacobian are reused through the Sherman-Morrison-Woodbury
+    identity instead of rebuilding and factorizing the Jacobian for every outage.
+    The iteration starts from the base case.
+
+    Returns:
+    - Voltage magnitudes in p.u. indexed by node index, or None if the case does not converge.
+    """
+    n = model["n"]
+    lu = model["lu"]
+    is_slack = model["is_slack"]
+    branch = model["branches"][branch_idx]
+    fr, to = branch["fr"], branch["to_idx"]
+    g, b = branch["y_pu"].real, branch["y_pu"].imag
+
+    def apply_Qt(x):
+        # Maps a state vector to [Re, Im] of V_fr - V_to
+        return np.array([x[fr] - x[to], x[fr + n] - x[to + n]])
+
+    # H' = H + U @ Qt, only the mismatch rows of the non-slack branch ends change
+    rows = []
+    U = []
+    for node, sign in ((fr, 1.0), (to, -1.0)):
+        if fr != to and not is_slack[node]:
+            rows.extend([2 * node, 2 * node + 1])
+            U.extend([[sign * g, -sign * b], [sign * b, sign * g]])
+    U_full = np.zeros((2 * n, 2))
+    if rows:
+        U_full[rows] = U
+    W = lu.solve(U_full)
+    C = np.eye(2) + apply_Qt(W)
+    if abs(np.linalg.det(C)) < np.finfo(float).eps:
+        return None
+
+    def solve_state(z):
+        # state = H'^-1 z
+        base = lu.solve(z)
+        return base - W @ np.linalg.solve(C, apply_Qt(base))
+
+    return _iterate(solve_state, model["V0"].copy(), model["S"], is_slack)
+
+
+def solve_islanded_outage(model, branch_idx):
+    """
+    Solve the power flow of the part still connected to a slack node after a bridge outage.
+
+    The de-energized nodes are dropped from the admittance matrix and the state, and the
+    remaining network is factorized directly.
+
+    Returns:
+    - Voltage magnitudes in p.u. indexed by node index (NaN for de-energized nodes), or
+      None if the case does not converge.
+    - Indices of the de-energized nodes.
+    """
+    n = model["n"]
+    is_slack = model["is_slack"]
+    branch = model["branches"][branch_idx]
+    fr, to = branch["fr"], branch["to_idx"]
+    y = branch["y_pu"]
+
+    # Nodes still reachable from a slack node
+    adjacency = _adjacency(n, model["branches"], skip=branch_idx)
+    energized = is_slack.copy()
+    stack = list(np.flatnonzero(is_slack))
+    while stack:
+        node = stack.pop()
+        for neighbour, _ in adjacency[node]:
+            if not energized[neighbour]:
+                energized[neighbour] = True
+                stack.append(neighbour)
+    keep = np.flatnonzero(energized)
+    lost = np.flatnonzero(~energized)
+
+    # Remove the branch stamp from the energized part of Y
+    position = -np.ones(n, dtype=int)
+    position[keep] = np.arange(len(keep))
+    stamp = [(i, j, value) for i, j, value in ((fr, fr, -y), (to, to, -y), (fr, to, y), (to, fr, y))
+             if energized[i] and energized[j]]
+    Y = model["Y"][keep][:, keep]
+    if stamp:
+        i, j, values = zip(*stamp)
+        Y = Y + coo_matrix((values, (position[list(i)], position[list(j)])), shape=Y.shape)
+
+    voltages = np.full(n, np.nan)
+    try:
+        lu = splu(build_jacobian(Y, is_slack[keep]))
+    except RuntimeError:  # Singular Jacobian
+        return None, lost
+    result = _iterate(lu.solve, model["V0"][keep].copy(), model["S"][keep], is_slack[keep])
+    if result is None:
+        return None, lost
+    voltages[keep] = result
+    return voltages, lost
+
+
+def _init_worker(model):
+    global _base_model
+    # SuperLU objects cannot be pickled, so each worker factorizes the shared Jacobian once
+    model["lu"] = splu(model["H"])
+    _base_model = model
+
+
+def _screen_outage(model, idx):
+    if idx in model["bridges"]:
+        return solve_islanded_outage(model, idx)
+    return solve_outage(model, idx), np.array([], dtype=int)
+
+
+def _screen_chunk(branch_indices):
+    return [(idx, *_screen_outage(_base_model, idx)) for idx in branch_indices]
+
+
+def screen_contingencies(system, workers=None, v_min=V_MIN, v_max=V_MAX):
+    """
+    N-1 contingency screening: remove each branch in turn and check the node voltages.
+
+    The base case is solved once and its sparse Jacobian shipped to each worker process
+    once via the pool initializer, where it is factorized; tasks only carry branch indices.
+    Outages that split the network are found up front; for those only the part still
+    connected to the slack is solved, and the de-energized nodes are reported.
+
+    Parameters:
+    - system: Loaded pyvolt network.System (with the Volt/VAR setting already applied).
+    - workers: Number of worker processes (defaults to the CPU count).
+    - v_min, v_max: Voltage limits in p.u.
+
+    Returns:
+    - Dictionary with the node names, the ranked outages with violations, the violation
+      matrix (rows follow the ranking, columns follow the node names, None for
+      de-energized nodes), the islanded outages with their lost nodes and the
+      non-converging outages.
+    """
+    model = build_base_model(system)
+    branches = model["branches"]
+    names = model["names"]
+    to_solve = list(range(len(branches)))
+
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, len(to_solve) // (4 * workers))
+    chunks = [to_solve[i:i + chunk_size] for i in range(0, len(to_solve), chunk_size)]
+
+    outage_results = []
+    if chunks:
+        # No more processes than there are chunks to hand out
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_worker,
+                                 initargs=(model,)) as executor:
+            for chunk_result in executor.map(_screen_chunk, chunks):
+                outage_results.extend(chunk_result)
+
+    def describe(branch):
+        return {"uuid": branch["uuid"], "from": branch["from"], "to": branch["to"]}
+
+    ranking = []
+    islanded = []
+    non_converged = []
+    for idx, voltages, lost in outage_results:
+        branch = branches[idx]
+        lost_nodes = [names[i] for i in lost]
+        if idx in model["bridges"]:
+            islanded.append({**describe(branch), "lost_nodes": lost_nodes})
+        if voltages is None:
+            non_converged.append(branch)
+            continue
+        energized = ~np.isnan(voltages)
+        violation = np.zeros(len(voltages))
+        violation[energized] = (np.maximum(voltages[energized] - v_max, 0)
+                                + np.maximum(v_min - voltages[energized], 0))
+        ranking.append({
+            "branch": branch,
+            "lost_nodes": lost_nodes,
+            "severity": float(np.sum(violation ** 2)),  # Same measure as the VVC voltage deviation
+            "violations": violation,
+            "energized": energized,
+            "min_voltage_pu": float(voltages[energized].min()),
+            "max_voltage_pu": float(voltages[energized].max()),
+        })
+    ranking.sort(key=lambda entry: entry["severity"], reverse=True)
+
+    logging.info(f"🔍 N-1 screening: {len(ranking)} solved ({len(islanded)} islanding), "
+                 f"{len(non_converged)} non-converging outages")
+
+    return {
+        "nodes": names,
+        "ranking": [{
+            **describe(entry["branch"]),
+            "severity": entry["severity"],
+            "min_voltage_pu": entry["min_voltage_pu"],
+            "max_voltage_pu": entry["max_voltage_pu"],
+            "violated_nodes": [names[i] for i in np.flatnonzero(entry["violations"])],
+            "lost_nodes": entry["lost_nodes"],
+        } for entry in ranking],
+        "violation_matrix": [
+            [float(v) if on else None for v, on in zip(entry["violations"], entry["energized"])]
+            for entry in ranking
+        ],
+        "islanded": islanded,
+        "non_converged": [describe(branch) for branch in non_converged],
+    }
@@ -110,7 +110,7 @@ def initialize_population(population_size, dimensions, lower_bounds, upper_bound
     return np.random.uniform(lower_bounds, upper_bounds, (population_size, dimensions))
 
 
-def fungal_growth_optimizer(N, Tmax, ub, lb, dim, fobj):
+def fungal_growth_optimizer(N, Tmax, ub, lb, dim, fobj, initial_solutions=None):
     """
     Multi-objective Fungal Growth Optimizer (FGO) closely replicating MATLAB implementation.
 
@@ -121,6 +121,7 @@ def fungal_growth_optimizer(N, Tmax, ub, lb, dim, fobj):
     - lb: Lower bounds (list or array).
     - dim: Dimension of the problem (number of decision variables).
     - fobj: Multi-objective function to evaluate solutions.
+    - initial_solutions: Optional solutions (e.g. a previous Pareto front) seeding up to half the population.
 
     Returns:
     - pareto_front: Final Pareto front of non-dominated solutions.
@@ -133,6 +134,10 @@ def fungal_growth_optimizer(N, Tmax, ub, lb, dim, fobj):
 
     # Initialization
     S = np.random.uniform(lb, ub, (N, dim))  # Initial population
+    if initial_solutions is not None:
+        # Warm start: replace at most half of the random members with the given solutions
+        seeds = np.array(initial_solutions[:N // 2], dtype=float).reshape(-1, dim)
+        S[:len(seeds)] = np.clip(seeds, lb, ub)
     pareto_archive = []  # Initialize Pareto archive
 
     print("HI")
@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import threading
+import numpy as np
+
+# Largest node voltage change (p.u.) for which the previous call still counts as a close start
+CLOSE_VOLTAGE_DELTA = 0.02
+# Fraction of the iteration budget kept when the starting state has not changed at all
+MIN_BUDGET_FRACTION = 0.25
+
+# Starting voltages plus last Pareto front and switch state per device group, per network
+_cache = {}
+_stats = {"calls": 0, "hits": 0, "evaluations": 0, "evaluations_saved": 0}
+# /optimize runs on Flask's threaded request handlers
+_lock = threading.Lock()
+
+
+def network_key(system):
+    """Identify a network by its node uuids, so each grid keeps its own warm start."""
+    uuids = "|".join(sorted(node.uuid for node in system.nodes))
+    return hashlib.sha1(uuids.encode()).hexdigest()
+
+
+def node_voltages(results_pf):
+    return {node.topology_node.uuid: abs(node.voltage_pu) for node in results_pf.nodes}
+
+
+def start_warm_start(key, voltages):
+    """
+    Open a warm start session for one /optimize call.
+
+    The session only looks at what the previous call stored, so the correction
+    iterations of a call never warm-start from each other. The iteration budget
+    fraction is decided once, from the starting state of the call.
+
+    Parameters:
+    - key: Network key (see network_key).
+    - voltages: Node voltage magnitudes at the start of the call.
+
+    Returns:
+    - Session dictionary passed to get_warm_start, store_warm_start and finish_warm_start.
+    """
+    with _lock:
+        previous = _cache.get(key)
+    budget_fraction = 1.0
+    delta = np.inf
+    if previous is not None:
+        common = voltages.keys() & previous["voltages"].keys()
+        delta = max((abs(voltages[uuid] - previous["voltages"][uuid]) for uuid in common), default=np.inf)
+        if delta < CLOSE_VOLTAGE_DELTA:
+            budget_fraction = max(delta / CLOSE_VOLTAGE_DELTA, MIN_BUDGET_FRACTION)
+
+    return {
+        "key": key,
+        "voltages": voltages,
+        "delta": delta,
+        "previous": previous["groups"] if previous is not None else {},
+        "groups": {},
+        "budget_fraction": budget_fraction,
+        "hit": False,
+        "evaluations": 0,
+        "evaluations_saved": 0,
+    }
+
+
+def get_warm_start(session, device_group, N, Tmax):
+    """
+    Seeds and iteration budget for one optimizer run of the call.
+
+    Parameters:
+    - session: Session from start_warm_start.
+    - device_group: "capacitor" or "reactor".
+    - N: Population size.
+    - Tmax: Full iteration budget.
+
+    Returns:
+    - initial_solutions: Distinct switch states of the previous call (None on a miss).
+    - Tmax: Iteration budget, shrunk when the starting state is close to the previous call's.
+    """
+    entry = session["previous"].get(device_group)
+    if entry is None:
+        session["evaluations"] += N * (Tmax + 1)
+        return None, Tmax
+
+    session["hit"] = True
+    # Distinct switch states only, the previously applied one first
+    initial_solutions = []
+    for solution in [entry["switch_state"]] + [sol[:-2] for sol in entry["pareto_front"]]:
+        binary_solution = [1 if state >= 0.5 else 0 for state in solution]
+        if binary_solution not in initial_solutions:
+            initial_solutions.append(binary_solution)
+
+    reduced_Tmax = max(1, int(np.ceil(Tmax * session["budget_fraction"])))
+    session["evaluations"] += N * (reduced_Tmax + 1)
+    session["evaluations_saved"] += N * (Tmax - reduced_Tmax)
+    return initial_solutions, reduced_Tmax
+
+
+def store_warm_start(session, device_group, pareto_front, switch_state):
+    session["groups"][device_group] = {
+        "pareto_front": [np.array(sol) for sol in pareto_front],
+        "switch_state": np.array(switch_state, dtype=float),
+    }
+
+
+def finish_warm_start(session):
+    """Keep the call's results for the next call and log the warm start statistics once per call."""
+    if not session["groups"]:
+        return  # No optimizer run in this call, keep the previous state as it is
+
+    with _lock:
+        # Device groups not optimized in this call keep their latest front, possibly from a concurrent call
+        latest = _cache.get(session["key"])
+        _cache[session["key"]] = {
+            "voltages": session["voltages"],
+            "groups": {**(latest["groups"] if latest is not None else {}), **session["groups"]},
+        }
+
+        _stats["calls"] += 1
+        _stats["hits"] += session["hit"]
+        _stats["evaluations"] += session["evaluations"]
+        _stats["evaluations_saved"] += session["evaluations_saved"]
+        hit_rate = f"hit rate {_stats['hits']}/{_stats['calls']}"
+        saved = f"{_stats['evaluations_saved']}/{_stats['evaluations'] + _stats['evaluations_saved']} evaluations saved so far"
+    if session["hit"]:
+        logging.info(f"🔥 Warm start hit: max ΔV = {session['delta']:.4f} p.u., "
+                     f"{session['evaluations_saved']} evaluations saved ({hit_rate}, {saved})")
+    else:
+        logging.info(f"🧊 Warm start miss ({hit_rate}, {saved})")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules are imported as in envvarco.py, relative to the module folder
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
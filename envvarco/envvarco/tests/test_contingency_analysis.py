@@ -0,0 +1,118 @@
+import copy
+import numpy as np
+import pytest
+from scipy.sparse.linalg import splu
+from pyvolt import network
+from pyvolt.network import BusType
+from src.contingency_analysis import (
+    build_base_model, find_bridges, solve_outage, solve_islanded_outage, screen_contingencies
+)
+
+
+def make_system(edges, loads):
+    system = network.System()
+    for i, (p, q) in enumerate(loads):
+        system.nodes.append(network.Node(uuid=f"N{i}", name=f"N{i}", base_voltage=20, base_apparent_power=25,
+                                         v_mag=20, p=p, q=q, index=i))
+    system.nodes[0].type = BusType.SLACK
+    for k, (fr, to) in enumerate(edges):
+        system.branches.append(network.Branch(uuid=f"L{k}", r=0.4, x=0.9, start_node=system.nodes[fr],
+                                              end_node=system.nodes[to], base_voltage=20, base_apparent_power=25))
+    system.Ymatrix_calc()
+    return system
+
+
+def direct_solve(system, branch_idx):
+    """
+    Re-solve from scratch after removing the branch and every node no longer fed from the slack.
+
+    Rebuilds Ymatrix with pyvolt and runs a dense Z-bus iteration, independent of the
+    factorization and low-rank update under test.
+    """
+    outage = copy.deepcopy(system)
+    del outage.branches[branch_idx]
+    energized = {outage.nodes[0].uuid}
+    changed = True
+    while changed:
+        changed = False
+        for branch in outage.branches:
+            ends = {branch.start_node.uuid, branch.end_node.uuid}
+            if ends & energized and not ends <= energized:
+                energized |= ends
+                changed = True
+    outage.nodes = [node for node in outage.nodes if node.uuid in energized]
+    outage.branches = [branch for branch in outage.branches if branch.start_node.uuid in energized]
+    outage.Ymatrix_calc()
+
+    Y = outage.Ymatrix
+    S = np.array([node.power_pu for node in outage.nodes])
+    V = np.ones(len(outage.nodes), dtype=complex)
+    for _ in range(200):
+        V[1:] = np.linalg.solve(Y[1:, 1:], -np.conj(S[1:] / V[1:]) - Y[1:, 0] * V[0])
+    return {node.name: abs(V[node.index]) for node in outage.nodes}
+
+
+@pytest.fixture
+def meshed_system():
+    edges = [(0, 1), (1, 2), (2, 3), (3, 4), (4, 1), (2, 5), (5, 6), (6, 2), (6, 7), (1, 2)]
+    loads = [(0, 0), (1.5, 0.5), (2, 0.8), (1, 0.2), (0.5, 0.1), (1.2, 0.4), (0.8, 0.3), (0.6, 0.2)]
+    return make_system(edges, loads)
+
+
+@pytest.fixture
+def radial_system():
+    edges = [(0, 1), (1, 2), (2, 3), (1, 4), (4, 5)]
+    loads = [(0, 0), (3, 1), (4, 1.5), (3, 1), (2, 0.5), (2, 0.5)]
+    return make_system(edges, loads)
+
+
+def test_find_bridges_matches_brute_force(meshed_system):
+    model = build_base_model(meshed_system)
+    for idx in range(len(model["branches"])):
+        reference = direct_solve(meshed_system, idx)
+        assert (idx in model["bridges"]) == (len(reference) < model["n"])
+    # The doubled N1-N2 branch is not a bridge
+    assert model["bridges"] == {0, 8}
+
+
+def test_solve_outage_matches_direct_solve(meshed_system):
+    model = build_base_model(meshed_system)
+    model["lu"] = splu(model["H"])
+    for idx in range(len(model["branches"])):
+        if idx in model["bridges"]:
+            continue
+        voltages = solve_outage(model, idx)
+        reference = direct_solve(meshed_system, idx)
+        for i, name in enumerate(model["names"]):
+            assert voltages[i] == pytest.approx(reference[name], abs=1e-7)
+
+
+def test_solve_islanded_outage_drops_lost_nodes(radial_system):
+    model = build_base_model(radial_system)
+    assert model["bridges"] == set(range(len(model["branches"])))
+    voltages, lost = solve_islanded_outage(model, 1)  # N1-N2 feeds N2 and N3
+    assert [model["names"][i] for i in lost] == ["N2", "N3"]
+    assert np.isnan(voltages[lost]).all()
+    reference = direct_solve(radial_system, 1)
+    for name, v in reference.items():
+        assert voltages[model["names"].index(name)] == pytest.approx(v, abs=1e-7)
+
+
+def test_screen_contingencies_radial(radial_system):
+    # Tight lower limit so the far end of the loaded feeder is in violation
+    report = screen_contingencies(radial_system, workers=2, v_min=0.99, v_max=1.05)
+    assert len(report["ranking"]) == len(radial_system.branches)
+    assert {entry["uuid"] for entry in report["islanded"]} == {b.uuid for b in radial_system.branches}
+    assert report["non_converged"] == []
+
+    # Losing the feeder head de-energizes everything but the slack
+    head = next(entry for entry in report["ranking"] if entry["uuid"] == "L0")
+    assert head["lost_nodes"] == ["N1", "N2", "N3", "N4", "N5"]
+
+    # Post-outage voltages of the energized part are checked and ranked by severity
+    severities = [entry["severity"] for entry in report["ranking"]]
+    assert severities == sorted(severities, reverse=True)
+    assert severities[0] > 0 and report["ranking"][0]["violated_nodes"]
+    assert head["severity"] == 0.0
+    row = report["violation_matrix"][report["ranking"].index(head)]
+    assert row[0] == 0.0 and row[1:] == [None] * 5
@@ -1,12 +1,16 @@
 import os
+import math
+import json
 import logging
+import threading
 import pandas as pd
 import numpy as np
 import requests
-from flask import Flask
+from flask import Flask, request
 from pathlib import Path
 import cimpy
 from pyvolt import network
+from pyvolt.network import BusType
 from pyvolt import nv_powerflow
 import time
 
@@ -20,6 +24,27 @@ logging.info("🔁 Starting grid parser in main.py...")
 # 📁 Ensure shared volume folder exists
 os.makedirs("/shared_volume", exist_ok=True)
 
+# Measurement ingestion: re-solve only once a node moves this far (p.u.) from the last solved state
+INGEST_POWER_THRESHOLD_PU = float(os.getenv("INGEST_POWER_THRESHOLD_PU", "0.01"))
+INGEST_VOLTAGE_THRESHOLD_PU = float(os.getenv("INGEST_VOLTAGE_THRESHOLD_PU", "0.005"))
+MEASUREMENT_FIELDS = ("uuid", "p", "q", "voltage_pu")
+VVC_TIMEOUT_S = float(os.getenv("VVC_TIMEOUT_S", "600"))
+
+# In-memory grid state (topology loaded once, measurements applied in place)
+base_apparent_power = 25
+system = None
+nodes_by_uuid = {}
+specified_powers = {}
+measured_voltages = {}
+solved_state = {}
+pending_nodes = set()
+system_lock = threading.Lock()
+
+# Volt/VAR control runs on one background worker; triggers arriving meanwhile are merged into the latest one
+pending_vvc_payload = None
+vvc_lock = threading.Lock()
+vvc_requested = threading.Event()
+
 def export_grid_to_excel(system, path="/shared_volume/grid_data.xlsx"):
     try:
         node_records = []
@@ -73,64 +98,204 @@ def export_grid_to_excel(system, path="/shared_volume/grid_data.xlsx"):
         logging.error(f"❌ Excel export failed: {e}")
         return False
 
-def parse_and_export():
+def load_system():
+    this_file_folder = Path(__file__).resolve().parent
+    xml_path = this_file_folder / "network"
+    xml_files = [
+        str(xml_path / "Rootnet_FULL_NE_06J16h_DI.xml"),
+        str(xml_path / "Rootnet_FULL_NE_06J16h_EQ.xml"),
+        str(xml_path / "Rootnet_FULL_NE_06J16h_SV.xml"),
+        str(xml_path / "Rootnet_FULL_NE_06J16h_TP.xml")
+    ]
+
+    res = cimpy.cim_import(xml_files, "cgmes_v2_4_15")
+    new_system = network.System()
+    new_system.load_cim_data(res["topology"], base_apparent_power)
+    use_system(new_system)
+    logging.info("✅ System loaded successfully.")
+
+def use_system(new_system):
+    """Make new_system the in-memory grid, keeping the streamed operating state."""
+    global system, nodes_by_uuid, specified_powers, measured_voltages, solved_state
+    system = new_system
+    nodes_by_uuid = {node.uuid: node for node in system.nodes}
+    # A reload replaces the topology, not the operating state: streamed values survive for nodes that still exist
+    specified_powers = {node.uuid: specified_powers.get(node.uuid, node.power) for node in system.nodes}
+    measured_voltages = {uuid: v for uuid, v in measured_voltages.items() if uuid in nodes_by_uuid}
+    solved_state = {}
+    pending_nodes.clear()
+
+def solve_and_inject():
+    global solved_state
+    # Solve for the specified (loaded or measured) injections, not the previously solved ones
+    for node in system.nodes:
+        node.power = specified_powers[node.uuid]
+        node.power_pu = node.power / node.base_apparent_power
+        if node.type == BusType.SLACK and node.uuid in measured_voltages:
+            # A measured slack voltage is the power flow setpoint; keep the angle, only the magnitude is measured
+            node.voltage_pu = measured_voltages[node.uuid] * np.exp(1j * np.angle(node.voltage_pu))
+            node.voltage = node.voltage_pu * node.baseVoltage
+    solved_state = {node.uuid: {"power_pu": node.power_pu} for node in system.nodes}
+
+    results_pf = nv_powerflow.solve(system)[0]
+
+    # Inject solved voltages and powers into system.nodes
+    for solved_node in results_pf.nodes:
+        uuid = solved_node.topology_node.uuid
+        target_node = nodes_by_uuid.get(uuid)
+        if target_node:
+            target_node.voltage = solved_node.voltage
+            target_node.voltage_pu = solved_node.voltage / target_node.baseVoltage
+            target_node.power = solved_node.power
+            target_node.power_pu = solved_node.power / target_node.base_apparent_power
+
+    # Measured magnitudes are compared against the values measured at this solve, not the computed ones
+    for node in system.nodes:
+        solved_state[node.uuid]["voltage_pu"] = measured_voltages.get(node.uuid, abs(node.voltage_pu))
+    pending_nodes.clear()
+
+def vvc_request():
+    """
+    Return the /optimize payload if the solved model violates the voltage limits, otherwise None.
+
+    envvarco re-solves from the payload (node powers and measured slack voltages), so only
+    violations the model reproduces trigger Volt/VAR control. Measured violations at other
+    nodes that the model does not show are logged instead.
+    """
+    def violates(v):
+        return not 0.95 <= v <= 1.05
+
+    if not any(violates(abs(node.voltage_pu)) for node in system.nodes):
+        unexplained = [uuid for uuid, v in measured_voltages.items() if violates(v)]
+        if unexplained:
+            logging.warning(f"⚠️ Measured voltage violation at {unexplained} not reproduced by the model, "
+                            f"Volt/VAR control not triggered.")
+        return None
+
+    node_powers = {uuid: [power.real, power.imag] for uuid, power in specified_powers.items()}
+    slack_voltages = {node.uuid: measured_voltages[node.uuid] for node in system.nodes
+                      if node.type == BusType.SLACK and node.uuid in measured_voltages}
+    return {"base_apparent_power": base_apparent_power, "node_powers": node_powers, "slack_voltages": slack_voltages}
+
+def trigger_vvc(payload):
+    global pending_vvc_payload
+    logging.info("⚠️ Voltage violation detected. Triggering Volt/VAR control.")
+    print("⚠️ Voltage violation detected. Triggering Volt/VAR control...")
+
+    with vvc_lock:
+        if pending_vvc_payload is not None:
+            logging.info("🔁 Volt/VAR control already pending, merged into the latest grid state.")
+        pending_vvc_payload = payload
+    vvc_requested.set()
+
+def vvc_worker():
+    global pending_vvc_payload
+    while True:
+        vvc_requested.wait()
+        with vvc_lock:
+            vvc_requested.clear()
+            payload, pending_vvc_payload = pending_vvc_payload, None
+        if payload is not None:
+            run_vvc(payload)
+
+def run_vvc(payload):
     try:
-        this_file_folder = Path(__file__).resolve().parent
-        xml_path = this_file_folder / "network"
-        xml_files = [
-            str(xml_path / "Rootnet_FULL_NE_06J16h_DI.xml"),
-            str(xml_path / "Rootnet_FULL_NE_06J16h_EQ.xml"),
-            str(xml_path / "Rootnet_FULL_NE_06J16h_SV.xml"),
-            str(xml_path / "Rootnet_FULL_NE_06J16h_TP.xml")
-        ]
-
-        res = cimpy.cim_import(xml_files, "cgmes_v2_4_15")
-        system = network.System()
-        base_apparent_power = 25
-        system.load_cim_data(res["topology"], base_apparent_power)
-        logging.info("✅ System loaded successfully.")
-
-        export_success = export_grid_to_excel(system)
+        response = requests.post("http://envvarco:4002/optimize", json=payload, timeout=VVC_TIMEOUT_S)
+        if response.status_code == 200:
+            print("✅ Volt/VAR control completed.")
+        else:
+            print(f"⚠️ Volt/VAR module returned: {response.status_code} - {response.text}")
+    except Exception as e:
+        logging.error(f"❌ Failed to trigger Volt/VAR module: {e}")
+        print(f"❌ Failed to trigger Volt/VAR module: {e}")
 
-        time.sleep(100)
-        results_pf = nv_powerflow.solve(system)[0]
+def parse_measurements(req):
+    """
+    Accept measurements as JSON lines, a single JSON record, a JSON list of records or
+    batched column arrays ({"uuid": [...], "p": [...], ...}). Powers are in MW/Mvar,
+    voltages in p.u. Raises ValueError before anything is applied if the payload is malformed.
+    """
+    if req.is_json:
+        payload = req.get_json(silent=True)
+        if payload is None:
+            raise ValueError("Invalid JSON payload")
+        if isinstance(payload, dict) and any(isinstance(value, list) for value in payload.values()):
+            columns = {k: payload[k] for k in MEASUREMENT_FIELDS if k in payload}
+            if "uuid" not in columns:
+                raise ValueError("Batched measurements need a 'uuid' array")
+            if not all(isinstance(values, list) for values in columns.values()):
+                raise ValueError("Batched measurements need an array for every field")
+            if len({len(values) for values in columns.values()}) > 1:
+                raise ValueError("Batched measurement arrays have different lengths")
+            measurements = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        elif isinstance(payload, dict):
+            measurements = [payload]
+        elif isinstance(payload, list):
+            measurements = payload
+        else:
+            raise ValueError("Measurements must be a JSON object or array")
+    else:
+        measurements = [json.loads(line) for line in req.get_data(as_text=True).splitlines() if line.strip()]
+
+    for measurement in measurements:
+        if not isinstance(measurement, dict) or not isinstance(measurement.get("uuid"), str):
+            raise ValueError(f"Measurement without node uuid: {measurement}")
+        for field in MEASUREMENT_FIELDS[1:]:
+            value = measurement.get(field, 0.0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+                raise ValueError(f"Measurement field '{field}' is not a finite number: {measurement}")
+        if "voltage_pu" in measurement and measurement["voltage_pu"] <= 0:
+            raise ValueError(f"Measured voltage must be positive: {measurement}")
+    return measurements
+
+def apply_measurements(measurements):
+    """Apply measurements in place to the loaded system. Returns the unknown node uuids."""
+    unknown = []
+    for measurement in measurements:
+        node = nodes_by_uuid.get(measurement["uuid"])
+        if node is None:
+            unknown.append(measurement["uuid"])
+            continue
+        if "p" in measurement or "q" in measurement:
+            power = specified_powers[node.uuid]
+            specified_powers[node.uuid] = complex(measurement.get("p", power.real), measurement.get("q", power.imag))
+        if "voltage_pu" in measurement:
+            measured_voltages[node.uuid] = measurement["voltage_pu"]
+        pending_nodes.add(node.uuid)
+    return unknown
+
+def threshold_crossed():
+    for uuid in pending_nodes:
+        node = nodes_by_uuid[uuid]
+        state = solved_state.get(uuid)
+        if state is None:
+            return True
+        if abs(specified_powers[uuid] / node.base_apparent_power - state["power_pu"]) > INGEST_POWER_THRESHOLD_PU:
+            return True
+        if uuid in measured_voltages and abs(measured_voltages[uuid] - state["voltage_pu"]) > INGEST_VOLTAGE_THRESHOLD_PU:
+            return True
+    return False
+
+def parse_and_export():
+    try:
+        with system_lock:
+            load_system()
 
-        # Inject solved voltages and powers into system.nodes
-        uuid_to_node_map = {node.uuid: node for node in system.nodes}
-        for solved_node in results_pf.nodes:
-            uuid = solved_node.topology_node.uuid
-            target_node = uuid_to_node_map.get(uuid)
-            if target_node:
-                target_node.voltage = solved_node.voltage
-                target_node.voltage_pu = solved_node.voltage / target_node.baseVoltage
-                target_node.power = solved_node.power
-                target_node.power_pu = solved_node.power / target_node.base_apparent_power
+            export_success = export_grid_to_excel(system)
 
-        export_success = export_grid_to_excel(system)
+        time.sleep(100)
+        with system_lock:
+            solve_and_inject()
+            export_success = export_grid_to_excel(system)
 
         time.sleep(100)
         
         # Check if any voltage violates the limits
-        voltage_violation = any(
-            not 0.95 <= abs(node.voltage_pu) <= 1.05 for node in system.nodes
-        )
+        with system_lock:
+            payload = vvc_request()
         logging.info("⚠️ hi.")
-        if voltage_violation:
-            logging.info("⚠️ Voltage violation detected. Triggering Volt/VAR control.")
-            print("⚠️ Voltage violation detected. Triggering Volt/VAR control...")
-
-            try:
-                response = requests.post(
-                    "http://envvarco:4002/optimize",
-                    json={"base_apparent_power": base_apparent_power}
-                )
-                if response.status_code == 200:
-                    print("✅ Volt/VAR control completed.")
-                else:
-                    print(f"⚠️ Volt/VAR module returned: {response.status_code} - {response.text}")
-            except Exception as e:
-                logging.error(f"❌ Failed to trigger Volt/VAR module: {e}")
-                print(f"❌ Failed to trigger Volt/VAR module: {e}")
+        if payload:
+            trigger_vvc(payload)
 
         return export_success
 
@@ -138,10 +303,58 @@ def parse_and_export():
         logging.error(f"❌ Export failed: {e}")
         return False
 
+@app.route('/ingest', methods=['POST'])
+def ingest():
+    try:
+        measurements = parse_measurements(request)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}, 400
+
+    try:
+        with system_lock:
+            if system is None:
+                return {"status": "error", "message": "System not loaded yet"}, 503
+            unknown = apply_measurements(measurements)
+            resolved = threshold_crossed()
+            payload = None
+            if resolved:
+                logging.info(f"📈 Change threshold crossed by {len(pending_nodes)} node(s), re-solving power flow.")
+                solve_and_inject()
+                export_grid_to_excel(system)
+                payload = vvc_request()
+        if payload:
+            trigger_vvc(payload)
+
+        return {
+            "status": "success",
+            "applied": len(measurements) - len(unknown),
+            "unknown_nodes": unknown,
+            "resolved": resolved
+        }, 200
+
+    except Exception as e:
+        logging.error(f"❌ Measurement ingestion failed: {e}")
+        return {"status": "error", "message": str(e)}, 500
+
+@app.route('/reload_topology', methods=['POST'])
+def reload_topology():
+    try:
+        with system_lock:
+            load_system()
+            solve_and_inject()
+            export_grid_to_excel(system)
+        return {"status": "success"}, 200
+    except Exception as e:
+        logging.error(f"❌ Topology reload failed: {e}")
+        return {"status": "error", "message": str(e)}, 500
+
 @app.route('/health', methods=['GET'])
 def health():
     return "🟢 main.py is live on port 4001", 200
 
+# Start Volt/VAR control worker at startup
+threading.Thread(target=vvc_worker, daemon=True).start()
+
 if __name__ == "__main__":
     success = parse_and_export()
     if success:
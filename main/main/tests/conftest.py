@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules are imported from the module folder, as when running main.py
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
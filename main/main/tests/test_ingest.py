@@ -0,0 +1,106 @@
+import pytest
+from pyvolt import network
+from pyvolt.network import BusType
+import main
+
+
+def make_system():
+    """Slack N0 feeding N1 and N2 in a line, loads in MW/Mvar on a 25 MVA base."""
+    system = network.System()
+    for i, (p, q) in enumerate([(0, 0), (1.0, 0.3), (1.0, 0.3)]):
+        system.nodes.append(network.Node(uuid=f"N{i}", name=f"N{i}", base_voltage=20, base_apparent_power=25,
+                                         v_mag=20, p=p, q=q, index=i))
+    system.nodes[0].type = BusType.SLACK
+    for k, (fr, to) in enumerate([(0, 1), (1, 2)]):
+        system.branches.append(network.Branch(uuid=f"L{k}", r=0.4, x=0.9, start_node=system.nodes[fr],
+                                              end_node=system.nodes[to], base_voltage=20, base_apparent_power=25))
+    system.Ymatrix_calc()
+    return system
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "specified_powers", {})
+    monkeypatch.setattr(main, "measured_voltages", {})
+    monkeypatch.setattr(main, "export_grid_to_excel", lambda system: True)
+    triggered = []
+    monkeypatch.setattr(main, "trigger_vvc", triggered.append)
+    main.use_system(make_system())
+    main.solve_and_inject()
+    test_client = main.app.test_client()
+    test_client.triggered = triggered
+    return test_client
+
+
+def test_json_lines(client):
+    body = '{"uuid": "N1", "p": 1.1}\n\n{"uuid": "X", "q": 1.0}\n'
+    response = client.post("/ingest", data=body, content_type="application/x-ndjson")
+    assert response.status_code == 200
+    assert response.json["applied"] == 1
+    assert response.json["unknown_nodes"] == ["X"]
+    assert main.specified_powers["N1"] == complex(1.1, 0.3)
+
+
+def test_single_record_and_list_of_records(client):
+    assert client.post("/ingest", json={"uuid": "N12", "p": 1.0}).json["unknown_nodes"] == ["N12"]
+    response = client.post("/ingest", json=[{"uuid": "N1", "q": 0.4}, {"uuid": "N2", "voltage_pu": 0.99}])
+    assert response.json["applied"] == 2
+    assert main.specified_powers["N1"] == complex(1.0, 0.4)
+    assert main.measured_voltages["N2"] == 0.99
+
+
+def test_column_batch(client):
+    response = client.post("/ingest", json={"uuid": ["N1", "N2"], "p": [1.05, 0.95], "q": [0.3, 0.3]})
+    assert response.json["applied"] == 2
+    assert main.specified_powers["N2"] == complex(0.95, 0.3)
+
+
+@pytest.mark.parametrize("body", [
+    '{"uuid": ["N1", "N2"], "p": [1.0]}',
+    '{"uuid": ["N1"], "p": 1.0}',
+    '[{"uuid": "N1", "p": 2.0}, {"uuid": "N2", "p": "abc"}]',
+    '[{"uuid": "N1", "p": 2.0}, {"uuid": "N2", "voltage_pu": NaN}]',
+    '{"uuid": "N1", "q": Infinity}',
+    '{"uuid": "N1", "voltage_pu": 0}',
+    '{"p": 1.0}',
+    '{not json',
+])
+def test_malformed_payload_is_rejected_before_applying(client, body):
+    response = client.post("/ingest", data=body, content_type="application/json")
+    assert response.status_code == 400
+    assert main.specified_powers["N1"] == complex(1.0, 0.3)
+    assert main.measured_voltages == {}
+
+
+def test_resolve_only_when_threshold_is_crossed(client):
+    # 0.1 MW on a 25 MVA base stays below the 0.01 p.u. threshold
+    assert client.post("/ingest", json={"uuid": "N1", "p": 1.1}).json["resolved"] is False
+    # Changes accumulate against the last solved state
+    assert client.post("/ingest", json={"uuid": "N1", "p": 1.3}).json["resolved"] is True
+    assert client.post("/ingest", json={"uuid": "N1", "p": 1.3}).json["resolved"] is False
+
+
+def test_repeated_voltage_measurement_resolves_once(client):
+    responses = [client.post("/ingest", json={"uuid": "N2", "voltage_pu": 0.97}).json for _ in range(3)]
+    assert [r["resolved"] for r in responses] == [True, False, False]
+    assert main.measured_voltages["N2"] == 0.97
+
+
+def test_measured_slack_overvoltage_triggers_vvc(client):
+    response = client.post("/ingest", json={"uuid": "N0", "voltage_pu": 1.09})
+    assert response.json["resolved"] is True
+    assert len(client.triggered) == 1
+    assert client.triggered[0]["slack_voltages"] == {"N0": 1.09}
+    assert client.triggered[0]["node_powers"]["N1"] == [1.0, 0.3]
+
+
+def test_measured_violation_not_in_model_does_not_trigger_vvc(client):
+    client.post("/ingest", json={"uuid": "N2", "voltage_pu": 0.90})
+    assert client.triggered == []
+
+
+def test_reload_keeps_streamed_state(client):
+    client.post("/ingest", json=[{"uuid": "N1", "p": 2.0}, {"uuid": "N2", "voltage_pu": 0.97}])
+    main.use_system(make_system())
+    assert main.specified_powers["N1"] == complex(2.0, 0.3)
+    assert main.measured_voltages == {"N2": 0.97}